@@ -8,7 +8,7 @@
 # - `onchanged(field, old_value)` after mutation
 #
 # These containers are used to wrap complex fields (lists, dicts, sets) so that changes
-# within them are detected and recorded via the parent model's `_mark_dirty` mechanism.
+# within them are detected and recorded as a bit in the parent model's dirty state.
 #
 # Classes:
 # - TrackedList: a tracked version of list
@@ -22,96 +22,174 @@
 #
 # Autor: Ruediger Kessel
 
+from copy import deepcopy
+
+# The slots live on the concrete classes: list/dict/set and a mixin with its
+# own non-empty slots would have conflicting instance layouts.
+_CONTAINER_SLOTS = ("_parent", "_field", "_bit", "_state")
+
+# Default for TrackedDict.update(): None must reach dict.update() and fail there
+_MISSING = object()
+
+# Source template for the mutating methods. Each method is emitted as
+# straight-line code that calls the builtin method directly (no super(),
+# no lambda, no shared helper frame). The dirty mark is a single int-or of
+# the field bit into the parent's state dict. Without registered hooks only
+# the mutation and the dirty mark remain, and the container then latches:
+# it switches to a subclass with the plain builtin methods, because the
+# field stays dirty until the parent clears it and re-arms the container.
+_METHOD_TEMPLATE = """
+def {name}(self{params}):
+    parent = self._parent
+    has_hooks = parent.__has_hooks__
+    if has_hooks and not parent._call_onchange(self._field, {elem}):
+        return None
+    result = _op(self{args})
+    state = self._state
+    state["__dirty_mask__"] = state.get("__dirty_mask__", 0) | self._bit
+    if has_hooks:
+        parent._call_onchanged(self._field, None)
+    elif type(self) is _cls:
+        self.__class__ = _cls._latched_class
+    return result
+"""
+
+
+def _tracked_methods(cls, base, specs, written=()):
+    # specs: (name, parameters, value passed to onchange);
+    # written: hand-written tracked methods of cls
+    for name, params, elem in specs:
+        args = ", ".join(p.split("=")[0] for p in params.split(", ") if p)
+        source = _METHOD_TEMPLATE.format(
+            name=name,
+            params=", " + params if params else "",
+            elem=elem,
+            args=", " + args if args else "",
+        )
+        namespace = {"_op": getattr(base, name), "_cls": cls}
+        exec(source, namespace)
+        method = namespace[name]
+        method.__qualname__ = f"{cls.__name__}.{name}"
+        setattr(cls, name, method)
+    # Same instance layout as cls, so __class__ can be swapped in both directions
+    names = [spec[0] for spec in specs] + list(written)
+    latched = type(
+        f"_Latched{cls.__name__}",
+        (cls,),
+        {"__slots__": (), **{name: getattr(base, name) for name in names}},
+    )
+    cls._latched_class = latched
+    return latched
+
 
 class TrackedContainerMixin:
-    def __init__(self, parent, field, callback, onchange, onchanged):
-        self._parent = parent
-        self._field = field
-        self._callback = callback
-        self._onchange = onchange
-        self._onchanged = onchanged
-
-    def _mark_dirty(self):
-        self._callback(self._field)
-
-    def _setter(self, oper, elem=None):
-        if self._onchange(self._field, elem):
-            if elem is None:
-                oper()
-            else:
-                oper(elem)
-            self._mark_dirty()
-            self._onchanged(self._field, None)
-
-    def _getter(self, oper, *args, **kwargs):
-        if self._onchange(self._field, None):
-            result = oper(*args, **kwargs)
-            self._mark_dirty()
-            self._onchanged(self._field, None)
-            return result
+    __slots__ = ()
 
+    # Used to rebind an existing container; the concrete classes set their
+    # slots inline to keep container creation to a single Python frame.
+    def __init__(self, parent, field, bit, state):
+        self._parent, self._field, self._bit, self._state = parent, field, bit, state
 
-class TrackedList(list, TrackedContainerMixin):
-    def __init__(self, iterable, parent, field, callback, onchange, onchanged):
-        list.__init__(self, iterable)
-        TrackedContainerMixin.__init__(self, parent, field, callback, onchange, onchanged)
+    # Copies are plain builtin containers detached from the model, cloned with
+    # the builtin constructor; a copied model wraps them again for itself.
+    def __copy__(self):
+        return self._builtin(self)
 
-    def append(self, item):
-        self._setter(super().append, item)
+    def __deepcopy__(self, memo):
+        return deepcopy(self._builtin(self), memo)
 
-    def extend(self, iterable):
-        self._setter(super().extend, iterable)
 
-    def insert(self, index, item):
-        self._setter(lambda elem: super(type(self), self).insert(index, item), item)
+class TrackedList(list, TrackedContainerMixin):
+    __slots__ = _CONTAINER_SLOTS
+    _builtin = list
 
-    def remove(self, item):
-        self._setter(super().remove, item)
+    def __init__(self, iterable, parent, field, bit, state):
+        list.__init__(self, iterable)
+        self._parent, self._field, self._bit, self._state = parent, field, bit, state
 
-    def pop(self, index=-1):
-        return self._getter(super().pop, index)
 
-    def clear(self):
-        self._setter(super().clear)
+_LatchedTrackedList = _tracked_methods(
+    TrackedList,
+    list,
+    [
+        ("append", "item", "item"),
+        ("extend", "iterable", "iterable"),
+        ("insert", "index, item", "item"),
+        ("remove", "item", "item"),
+        ("pop", "index=-1", "None"),
+        ("clear", "", "None"),
+    ],
+)
 
 
 class TrackedDict(dict, TrackedContainerMixin):
-    def __init__(self, mapping, parent, field, callback, onchange, onchanged):
-        dict.__init__(self, mapping)
-        TrackedContainerMixin.__init__(self, parent, field, callback, onchange, onchanged)
-
-    def __setitem__(self, key, value):
-        self._setter(lambda elem: super(type(self), self).__setitem__(key, value), (key, value))
-
-    def __delitem__(self, key):
-        self._setter(lambda elem: super(type(self), self).__delitem__(key), key)
-
-    def update(self, iterable):
-        self._setter(lambda elem: super(type(self), self).update(iterable), iterable)
+    __slots__ = _CONTAINER_SLOTS
+    _builtin = dict
 
-    def pop(self, key, default=None):
-        return self._getter(super().pop, key, default)
-
-    def clear(self):
-        self._setter(super().clear)
+    def __init__(self, mapping, parent, field, bit, state):
+        dict.__init__(self, mapping)
+        self._parent, self._field, self._bit, self._state = parent, field, bit, state
+
+    # Written out instead of generated: positional-only mapping plus keywords,
+    # without packing *args for the common single-mapping call.
+    def update(self, other=_MISSING, /, **kwargs):
+        parent = self._parent
+        has_hooks = parent.__has_hooks__
+        if has_hooks and not parent._call_onchange(
+            self._field, kwargs if other is _MISSING else other
+        ):
+            return
+        if other is not _MISSING:
+            dict.update(self, other)
+        if kwargs:
+            dict.update(self, kwargs)
+        state = self._state
+        state["__dirty_mask__"] = state.get("__dirty_mask__", 0) | self._bit
+        if has_hooks:
+            parent._call_onchanged(self._field, None)
+        elif type(self) is TrackedDict:
+            self.__class__ = _LatchedTrackedDict
+
+
+_LatchedTrackedDict = _tracked_methods(
+    TrackedDict,
+    dict,
+    [
+        ("__setitem__", "key, value", "(key, value)"),
+        ("__delitem__", "key", "key"),
+        ("pop", "key, default=None", "None"),
+        ("clear", "", "None"),
+    ],
+    written=("update",),
+)
+
+
+# dict.pop() raises KeyError for a missing key; TrackedDict.pop() returns the
+# default None instead, latched or not.
+def _latched_dict_pop(self, key, default=None):
+    return dict.pop(self, key, default)
+
+
+_LatchedTrackedDict.pop = _latched_dict_pop
 
 
 class TrackedSet(set, TrackedContainerMixin):
-    def __init__(self, iterable, parent, field, callback, onchange, onchanged):
-        set.__init__(self, iterable)
-        TrackedContainerMixin.__init__(self, parent, field, callback, onchange, onchanged)
-
-    def add(self, elem):
-        self._setter(super().add, elem)
+    __slots__ = _CONTAINER_SLOTS
+    _builtin = set
 
-    def discard(self, elem):
-        self._setter(super().discard, elem)
-
-    def remove(self, elem):
-        self._setter(super().remove, elem)
-
-    def pop(self):
-        return self._getter(super().pop)
-
-    def clear(self):
-        self._setter(super().clear)
+    def __init__(self, iterable, parent, field, bit, state):
+        set.__init__(self, iterable)
+        self._parent, self._field, self._bit, self._state = parent, field, bit, state
+
+
+_LatchedTrackedSet = _tracked_methods(
+    TrackedSet,
+    set,
+    [
+        ("add", "elem", "elem"),
+        ("discard", "elem", "elem"),
+        ("remove", "elem", "elem"),
+        ("pop", "", "None"),
+        ("clear", "", "None"),
+    ],
+)
@@ -19,12 +19,38 @@
 #
 # Autor: Ruediger Kessel
 
+import sys
+import threading
 import warnings
+from contextlib import contextmanager
 from typing import Any, Callable, Optional, get_origin
 
-from pydantic import PrivateAttr
+from pydantic import BaseModel, PrivateAttr, model_validator
 
-from .containers import TrackedDict, TrackedList, TrackedSet
+from .containers import TrackedContainerMixin, TrackedDict, TrackedList, TrackedSet
+
+# Container-Klasse je Feldtyp (get_origin der Annotation)
+_TRACKED_TYPES = {list: TrackedList, dict: TrackedDict, set: TrackedSet}
+
+# Umwandlungen aus redis_om.model.model, die HashModel.get() auf die gelesenen
+# Hash-Felder anwendet (ältere redis-om-Versionen haben nicht alle)
+_HASH_DECODERS = (
+    "convert_empty_strings_to_none",
+    "convert_timestamp_to_datetime",
+    "convert_base64_to_bytes",
+    "convert_bytes_to_vector",
+)
+
+
+class _UnitOfWork(threading.local):
+    # Je Thread: vorgemerkte Modelle des aktiven unit_of_work()-Blocks
+    queue = None
+
+
+_unit_of_work = _UnitOfWork()
+
+# Höchstzahl gecachter Bitmasken je Klasse (siehe _mask_field_names)
+_MASK_NAMES_CACHE_SIZE = 256
 
 
 class TrackingMixin:
@@ -33,18 +59,215 @@ class TrackingMixin:
     )
     _onchanged: Optional[Callable[["TrackingMixin", str, Any], None]] = PrivateAttr(default=None)
 
-    def __init__(self, **data):
-        super().__init__(**data)
-        for field, value in self.model_dump().items():
-            if field in self.__class__.model_fields:
-                super().__setattr__(field, self._wrap(field, value))
-        self.__original_data__ = self.model_dump()
-        self.__dirty_fields__ = set()
-        self.__is_new__ = True
-
-    def _mark_dirty(self, field):
-        self.__dirty_fields__.add(field)
-        self.__is_new__ = False
+    __tracked_factories__ = {}
+    __container_fields__ = ()
+    __tracking_setattr_handlers__ = {}
+    __tracked_field_names__ = frozenset()
+    __field_names__ = ()
+    __field_bits__ = {}
+    __mask_names__ = {0: ()}
+    __empty_container_fields__ = ()
+    __has_hooks__ = False
+    __has_parent_save__ = False
+    __warned_no_save__ = False
+    __is_hash_model__ = False
+    __is_redis_model__ = False
+    __batch_state__ = None
+    # Dirty-Status als Bitmaske; Container und Setter schreiben direkt in das
+    # __dict__ des Modells (kein Python-Frame je Änderung). Bis zur ersten
+    # Änderung gelten die Klassenwerte, ein frisches Modell schreibt nichts.
+    # __is_new__ wird erst in is_new()/clear_dirty()/save() ausgewertet.
+    __dirty_mask__ = 0
+    __is_new__ = True
+    # Datensatz existiert in der Datenbank (gesetzt von save(), get(), reload_many(),
+    # construct_tracked()); clear_dirty() setzt nur __is_new__ zurück
+    __is_stored__ = False
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+        if "__field_names__" not in cls.__dict__:
+            cls._build_tracking_tables()
+
+    @classmethod
+    def __pydantic_on_complete__(cls):
+        # Pydantic >= 2.12: nach dem Erzeugen und erneut, wenn Vorwärtsreferenzen
+        # später aufgelöst werden (model_rebuild() oder automatisch). Erst dann ist
+        # z.B. bei "list[Line]" der Containertyp des Feldes bekannt.
+        super().__pydantic_on_complete__()
+        cls._build_tracking_tables()
+
+    @classmethod
+    def _build_tracking_tables(cls):
+        cls.__tracked_factories__ = cls._tracked_field_map()
+        cls.__tracked_field_names__ = frozenset(cls.model_fields)
+        # Bit je Feld in Deklarationsreihenfolge für den Dirty-Status (__dirty_mask__).
+        # Internierte Namen: Vergleiche mit Literalen treffen den Identitätsfall,
+        # auch bei zur Laufzeit erzeugten Modellen (create_model)
+        cls.__field_names__ = tuple(sys.intern(name) for name in cls.model_fields)
+        cls.__field_bits__ = {name: 1 << i for i, name in enumerate(cls.__field_names__)}
+        cls.__mask_names__ = {0: ()}
+        cls.__container_fields__ = tuple(
+            (field, factory, cls.__field_bits__[field])
+            for field, factory in cls.__tracked_factories__.items()
+            if factory is not None
+        )
+        cls.__empty_container_fields__ = cls._empty_container_fields()
+        cls.__has_hooks__ = cls._class_has_hooks()
+        cls.__has_parent_save__ = cls._class_has_parent_save()
+        cls.__warned_no_save__ = False
+        cls.__is_hash_model__ = cls._class_has_redis_om_base("HashModel")
+        cls.__is_redis_model__ = cls._class_has_redis_om_base("RedisModel")
+        # Handler aller Felder gleich vollständig anlegen: die Tabelle wächst nicht
+        # mehr beim jeweils ersten Setzen eines Feldes (nur Nicht-Felder kommen hinzu)
+        cls.__tracking_setattr_handlers__ = {
+            name: cls._tracking_setattr_handler(name) for name in cls.__field_names__
+        }
+
+    @classmethod
+    def _tracked_field_map(cls):
+        factories = {}
+        for field, info in cls.model_fields.items():
+            factories[field] = _TRACKED_TYPES.get(get_origin(info.annotation))
+        return factories
+
+    @classmethod
+    def _empty_container_fields(cls):
+        # Container-Felder mit default_factory=list/dict/set (ohne Alias), die
+        # construct_tracked() selbst leer anlegt
+        return tuple(
+            (field, info.default_factory)
+            for field, info in cls.model_fields.items()
+            if cls.__tracked_factories__[field] is not None
+            and info.default_factory in _TRACKED_TYPES
+            and info.alias is None
+            and info.validation_alias is None
+        )
+
+    @classmethod
+    def _class_has_hooks(cls):
+        # In der Klasse definierte Hooks sind immer aktiv
+        return (
+            cls.onchange is not TrackingMixin.onchange
+            or cls.onchanged is not TrackingMixin.onchanged
+            or callable(getattr(cls, "_onchange", None))
+            or callable(getattr(cls, "_onchanged", None))
+        )
+
+    @classmethod
+    def _class_has_parent_save(cls):
+        # save() der Klassen hinter TrackingMixin in der MRO (Ziel von super().save())
+        mro = cls.__mro__
+        return any("save" in base.__dict__ for base in mro[mro.index(TrackingMixin) + 1 :])
+
+    @classmethod
+    def _class_has_redis_om_base(cls, name):
+        # redis-om ist optional und wird hier nicht importiert
+        return any(
+            base.__name__ == name and base.__module__.startswith("redis_om") for base in cls.__mro__
+        )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Container-Felder im Validierungslauf von Pydantic einpacken: ein Durchgang für
+        # __init__, model_validate() und validate_assignment (Pydantic liefert dort neue,
+        # nicht getrackte Container). Je Klasse ein eigener after-Validator, als letzter
+        # eingetragen: er läuft nach allen Validatoren des Modells, auch denen von
+        # Unterklassen. Diese sehen beim Erzeugen also noch einfache Container, ein
+        # frisches Modell ist sauber und neu.
+
+        def wrap_validated_fields(self):
+            if type(self) is not cls:
+                return self
+            fields = self.__dict__
+            state = self.__batch_state__
+            if state is None:
+                state = fields
+            for field, factory, bit in self.__container_fields__:
+                value = fields[field]
+                if not isinstance(value, factory) or value._parent is not self:
+                    fields[field] = factory(value, self, field, bit, state)
+                else:
+                    # validate_assignment ersetzt __dict__, die Container zeigen noch auf das alte
+                    value._state = state
+            return self
+
+        setattr(
+            cls,
+            f"_wrap_validated_fields_{id(cls):x}",
+            model_validator(mode="after")(wrap_validated_fields),
+        )
+
+    def _wrap_fields(self):
+        # Direkt in __dict__: kein Setter und kein Eintrag in model_fields_set
+        fields = self.__dict__
+        for field, factory in self.__tracked_factories__.items():
+            if factory is not None and field in fields:
+                fields[field] = self._wrap(field, fields[field])
+
+    def _dirty_state(self):
+        # Ziel der Dirty-Bits: das Modell selbst oder der Zwischenstand von batch_updates()
+        if self.__batch_state__ is None:
+            return self.__dict__
+        return self.__batch_state__
+
+    def _take_batch_mask(self):
+        # Im batch_updates()-Block vorgemerkte Felder: save() und clear_dirty()
+        # erledigen sie mit, am Blockende kommen sie nicht wieder
+        state = self.__batch_state__
+        if state is not None and state["__dirty_mask__"]:
+            self.__dirty_mask__ |= state["__dirty_mask__"]
+            state["__dirty_mask__"] = 0
+
+    def _set_container_state(self, state):
+        # Setzt auch eingerastete Container (siehe containers.py) wieder scharf
+        for field, factory in self.__tracked_factories__.items():
+            if factory is not None:
+                value = self.__dict__.get(field)
+                if isinstance(value, factory):
+                    value._state = state
+                    if type(value) is factory._latched_class:
+                        value.__class__ = factory
+
+    @contextmanager
+    def batch_updates(self):
+        # Hooks ruhen im Block; geänderte Felder werden erst am Ende markiert
+        # und lösen dann je ein onchanged(field, None) aus.
+        if self.__batch_state__ is not None:
+            yield self
+            return
+        self.__batch_state__ = {"__dirty_mask__": 0}
+        self.__has_hooks__ = False
+        self._set_container_state(self.__batch_state__)
+        try:
+            yield self
+        finally:
+            mask = self.__batch_state__["__dirty_mask__"]
+            self.__batch_state__ = None
+            self._set_container_state(self.__dict__)
+            self._update_has_hooks()
+            if mask:
+                self.__dirty_mask__ |= mask
+                if self.__has_hooks__:
+                    for field in self._mask_field_names(mask):
+                        self._call_onchanged(field, None)
+
+    def _mask_field_names(self, mask):
+        # Feldnamen je Bitmaske, pro Klasse gecacht; begrenzt, da bei vielen
+        # Feldern beliebig viele Kombinationen möglich sind
+        names = self.__mask_names__.get(mask)
+        if names is None:
+            field_names = self.__field_names__
+            found = []
+            bits = mask
+            while bits:
+                low = bits & -bits
+                found.append(field_names[low.bit_length() - 1])
+                bits ^= low
+            names = tuple(found)
+            if len(self.__mask_names__) < _MASK_NAMES_CACHE_SIZE:
+                self.__mask_names__[mask] = names
+        return names
 
     def _call_onchange(self, name, value):
         if callable(self.onchange):
@@ -62,6 +285,7 @@ class TrackingMixin:
     @onchange.setter
     def onchange(self, func):
         self._onchange = func
+        self._update_has_hooks()
 
     @property
     def onchanged(self):
@@ -70,101 +294,358 @@ class TrackingMixin:
     @onchanged.setter
     def onchanged(self, func):
         self._onchanged = func
+        self._update_has_hooks()
+
+    def _update_has_hooks(self):
+        if self.__batch_state__ is not None:
+            return
+        self.__has_hooks__ = type(self).__has_hooks__ or (
+            self._onchange is not None or self._onchanged is not None
+        )
+        if self.__has_hooks__:
+            self._set_container_state(self.__dict__)
 
     def _call_onchanged(self, name, old):
         if callable(self.onchanged):
             self.onchanged(name, old)
 
+    def __copy__(self):
+        copied = super().__copy__()
+        copied._init_copy()
+        return copied
+
+    def __deepcopy__(self, memo=None):
+        copied = super().__deepcopy__(memo)
+        copied._init_copy()
+        return copied
+
+    def _init_copy(self):
+        # Die Kopie erhält eigene Container: flache Kopie mit dem Konstruktor des
+        # Containertyps statt geteilter (oder per deepcopy samt Modell kopierter) Objekte
+        fields = self.__dict__
+        if fields.pop("__batch_state__", None) is not None:
+            self._update_has_hooks()
+        for field, factory in self.__tracked_factories__.items():
+            if factory is not None and field in fields:
+                fields[field] = factory(
+                    fields[field], self, field, self.__field_bits__[field], fields
+                )
+
     def _wrap(self, field, value):
-        t = get_origin(self.__class__.model_fields[field].annotation)
-        if t is list and not isinstance(value, TrackedList):
-            return TrackedList(
-                value, self, field, self._mark_dirty, self._call_onchange, self._call_onchanged
-            )
-        elif t is dict and not isinstance(value, TrackedDict):
-            return TrackedDict(
-                value, self, field, self._mark_dirty, self._call_onchange, self._call_onchanged
-            )
-        elif t is set and not isinstance(value, TrackedSet):
-            return TrackedSet(
-                value, self, field, self._mark_dirty, self._call_onchange, self._call_onchanged
+        factory = self.__tracked_factories__.get(field)
+        if factory is None:
+            return value
+        if isinstance(value, factory):
+            if value._parent is self and value._field == field:
+                return value
+            # Container eines anderen Modells/Felds umhängen statt die Elemente zu kopieren
+            TrackedContainerMixin.__init__(
+                value, self, field, self.__field_bits__[field], self._dirty_state()
             )
-        else:
+            if type(value) is factory._latched_class:
+                value.__class__ = factory
             return value
+        return factory(value, self, field, self.__field_bits__[field], self._dirty_state())
 
     def __setattr__(self, name, value):
-        if name.startswith("_"):
-            super().__setattr__(name, value)
-            return
-        if hasattr(self.__class__, "model_fields") and (name in self.__class__.model_fields):
-            old = getattr(self, name, None)
-            if old != value:
-                result = self._call_onchange(name, value)
-                if not result:
+        handler = self.__tracking_setattr_handlers__.get(name)
+        if handler is None:
+            handler = self._tracking_setattr_handler(name)
+            self.__tracking_setattr_handlers__[name] = handler
+        handler(self, name, value)
+
+    @classmethod
+    def _tracking_setattr_handler(cls, name):
+        # Wird je Klasse und Attributname einmal bestimmt und gecacht
+        base_setattr = super().__setattr__
+        # Private Attribute (Unterstrich) sind nie Modellfelder
+        if name not in cls.__tracked_field_names__:
+            return base_setattr
+        factory = cls.__tracked_factories__[name]
+        bit = cls.__field_bits__[name]
+        store = base_setattr
+        validated = bool(cls.model_config.get("validate_assignment"))
+        if (
+            base_setattr is BaseModel.__setattr__
+            and not validated
+            and not cls.model_config.get("frozen")
+            and not cls.model_fields[name].frozen
+        ):
+            store = _store_field
+        # Dasselbe Objekt erneut zuweisen: nur ohne Validierung/frozen überspringen,
+        # sonst muss Pydantic prüfen (z.B. frozen_instance)
+        plain = store is _store_field
+
+        # Getrennte Handler für Container- und Einzelwertfelder, damit der
+        # Setter je Aufruf nur den Pfad seines Feldtyps durchläuft
+        if factory is None:
+
+            def handler(self, name, value):
+                fields = self.__dict__
+                old = fields.get(name)
+                if old is value and plain:
                     return
-                value = self._wrap(name, value)
-                self.__is_new__ = False
-                self.__dirty_fields__.add(name)
-                super().__setattr__(name, value)
-                self._call_onchanged(name, old)
-                return
-        super().__setattr__(name, value)
+                if old == value:
+                    store(self, name, value)
+                    return
+                has_hooks = self.__has_hooks__
+                if has_hooks and not self._call_onchange(name, value):
+                    return
+                store(self, name, value)
+                # Nach dem Speichern: validate_assignment ersetzt __dict__
+                state = self.__batch_state__
+                if state is None:
+                    state = self.__dict__
+                state["__dirty_mask__"] = state.get("__dirty_mask__", 0) | bit
+                if has_hooks:
+                    self._call_onchanged(name, old)
+
+        else:
+
+            def handler(self, name, value):
+                fields = self.__dict__
+                old = fields.get(name)
+                if old is value:
+                    if not plain:
+                        store(self, name, value)
+                    return
+                # Ein neuer Container gilt immer als Änderung (kein O(n)-Vergleich)
+                has_hooks = self.__has_hooks__
+                if has_hooks and not self._call_onchange(name, value):
+                    return
+                # Mit validate_assignment packt der Validator die validierte Kopie ein;
+                # ein fremder Container wird dann nicht umgehängt
+                if not validated:
+                    value = self._wrap(name, value)
+                store(self, name, value)
+                # Nach dem Speichern: validate_assignment ersetzt __dict__
+                state = self.__batch_state__
+                if state is None:
+                    state = self.__dict__
+                state["__dirty_mask__"] = state.get("__dirty_mask__", 0) | bit
+                if has_hooks:
+                    self._call_onchanged(name, old)
+
+        return handler
 
     @classmethod
     def get(cls, key):
         obj = super().get(key)
-        for field, value in obj.model_dump().items():
-            if field in obj.__class__.model_fields:
-                super(obj.__class__, obj).__setattr__(field, obj._wrap(field, value))
-        obj.__original_data__ = obj.model_dump()
-        obj.__dirty_fields__ = set()
-        obj.__is_new__ = False
+        obj._init_loaded()
         return obj
 
-    def save(self, force=False):
-        if force or self.is_dirty() or self.__is_new__:
+    @classmethod
+    def reload_many(cls, pks):
+        # Mehrere gespeicherte HashModels mit einem Roundtrip laden (HGETALL je
+        # Schlüssel in einer Pipeline); fehlende Schlüssel ergeben None
+        if not cls.__is_hash_model__:
+            raise TypeError("reload_many() requires a redis-om HashModel")
+        from redis_om.model import model as redis_om_model
+
+        decoders = [getattr(redis_om_model, name, None) for name in _HASH_DECODERS]
+        pks = list(pks)
+        pipe = cls.db().pipeline(transaction=False)
+        for pk in pks:
+            pipe.hgetall(cls.make_primary_key(pk))
+        result = []
+        for pk, document in zip(pks, pipe.execute()):
+            if not document:
+                result.append(None)
+                continue
+            # Dieselben Umwandlungen wie HashModel.get(), inklusive Rückfall für
+            # Verbindungen ohne decode_responses (Bytes statt str)
             try:
-                result = super().save()
-            except AttributeError:
-                warnings.warn(
-                    "Calling save(), but no save() method is defined in the parent class.",
-                    category=UserWarning,
-                    stacklevel=2,
-                )
+                obj = cls._validate_hash_document(document, pk, decoders)
+            except TypeError:
+                document = redis_om_model.decode_redis_value(document, cls.Meta.encoding)
+                obj = cls._validate_hash_document(document, pk, decoders)
+            obj._init_loaded()
+            result.append(obj)
+        return result
+
+    @classmethod
+    def _validate_hash_document(cls, document, pk, decoders):
+        for decode in decoders:
+            if decode is not None:
+                document = decode(document, cls.model_fields)
+        return cls.model_validate({**document, cls._meta.primary_key.name: pk})
+
+    @classmethod
+    def construct_tracked(cls, **data):
+        # Für vertrauenswürdige Daten (DB, Cache): model_construct() ohne Validierung.
+        # Leere Container-Defaults werden hier angelegt: model_construct() prüft
+        # sonst bei jedem Aufruf per inspect.signature() die default_factory.
+        empty = {}
+        for field, make in cls.__empty_container_fields__:
+            if field not in data:
+                empty[field] = make()
+        obj = cls.model_construct(**empty, **data)
+        if empty:
+            obj.__pydantic_fields_set__.difference_update(empty)
+        obj._init_loaded()
+        return obj
+
+    def _init_loaded(self):
+        self._wrap_fields()
+        self.__is_new__ = False
+        self.__is_stored__ = True
+
+    @staticmethod
+    @contextmanager
+    def unit_of_work():
+        # save() merkt Modelle im Block nur vor; am Ende wird jedes einmal
+        # gespeichert, redis-om-Modelle in einer Pipeline je Datenbank.
+        # Bei einer Ausnahme im Block wird nichts gespeichert.
+        if _unit_of_work.queue is not None:
+            yield
+            return
+        queue = _unit_of_work.queue = {}
+        try:
+            yield
+        finally:
+            _unit_of_work.queue = None
+        _flush_unit_of_work(queue.values())
+
+    def save(self, force=False, **kwargs):
+        queue = _unit_of_work.queue
+        if queue is not None and not kwargs:
+            queued = queue.get(id(self))
+            queue[id(self)] = (self, force or (queued is not None and queued[1]))
+            return None
+        # kwargs gehen an save() der Elternklasse, z.B. pipeline= bei redis-om:
+        # mehrere Modelle lassen sich so in einer Pipeline (ein Roundtrip) speichern
+        self._take_batch_mask()
+        if force or self.is_dirty() or self.__is_new__:
+            if (
+                self.__is_hash_model__
+                and not force
+                and self.__is_stored__
+                and self.__dirty_mask__
+                and kwargs.keys() <= {"pipeline"}
+            ):
+                result = self._save_dirty_fields(**kwargs)
+            elif self.__has_parent_save__:
+                result = super().save(**kwargs)
+                self.__is_stored__ = True
+            else:
+                # Einmal je Klasse warnen, danach ohne warnings-Aufruf
+                if not self.__warned_no_save__:
+                    type(self).__warned_no_save__ = True
+                    warnings.warn(
+                        "Calling save(), but no save() method is defined in the parent class.",
+                        category=UserWarning,
+                        stacklevel=2,
+                    )
                 result = None
-            self.__original_data__ = self.model_dump()
-            self.__dirty_fields__ = set()
+            self.__dirty_mask__ = 0
             self.__is_new__ = False
+            self._set_container_state(self._dirty_state())
             return result
         return None
 
+    def _save_dirty_fields(self, pipeline=None):
+        # Gespeichertes HashModel: nur die geänderten Felder schreiben. Die Kodierung
+        # übernimmt HashModel.save(), dessen Befehle aufgezeichnet statt gesendet werden.
+        recorder = _CommandRecorder()
+        super().save(pipeline=recorder)
+        dirty = set(self._mask_field_names(self.__dirty_mask__))
+        conn = pipeline
+        if conn is None:
+            conn = self.db().pipeline(transaction=False)
+        for name, args, kwargs in recorder.commands:
+            if name == "hset":
+                key, document = args[0], kwargs["mapping"]
+                mapping = {field: document[field] for field in dirty if field in document}
+                if mapping:
+                    conn.hset(key, mapping=mapping)
+                # None-Werte lässt HashModel.save() weg, das Feld wird gelöscht
+                removed = [field for field in dirty if field not in document]
+                if removed:
+                    conn.hdel(key, *removed)
+            elif name != "hexpire" or args[2] in dirty:
+                getattr(conn, name)(*args, **kwargs)
+        if pipeline is None:
+            conn.execute()
+        return self
+
     def is_dirty(self):
-        return bool(self.__dirty_fields__)
+        return self.__dirty_mask__ != 0
 
     def is_new(self):
-        return self.__is_new__
+        return self.__is_new__ and not self.__dirty_mask__
 
     def dirty_fields(self):
-        return list(self.__dirty_fields__)
+        return list(self._mask_field_names(self.__dirty_mask__))
+
+    def iter_dirty_fields(self):
+        return iter(self._mask_field_names(self.__dirty_mask__))
 
     def clear_dirty(self):
-        self.__original_data__ = self.model_dump()
-        self.__dirty_fields__.clear()
+        self._take_batch_mask()
+        if self.__dirty_mask__:
+            self.__is_new__ = False
+        self.__dirty_mask__ = 0
+        self._set_container_state(self._dirty_state())
+
+
+class _CommandRecorder:
+    # Wird HashModel.save() als pipeline= übergeben und zeichnet die Befehle auf
+    def __init__(self):
+        self.commands = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return record
+
+
+def _flush_unit_of_work(entries):
+    entries = list(entries)
+    states = [
+        (model, model.__dirty_mask__, model.__is_new__, model.__is_stored__) for model, _ in entries
+    ]
+    pipelines = {}
+    try:
+        for model, force in entries:
+            if model.__is_redis_model__:
+                db = model.db()
+                if id(db) not in pipelines:
+                    pipelines[id(db)] = db.pipeline(transaction=False)
+                model.save(force=force, pipeline=pipelines[id(db)])
+            else:
+                model.save(force=force)
+        for pipe in pipelines.values():
+            pipe.execute()
+    except BaseException:
+        # Nicht geschriebene Änderungen bleiben dirty
+        for model, mask, is_new, is_stored in states:
+            model.__dirty_mask__ = mask
+            model.__is_new__ = is_new
+            model.__is_stored__ = is_stored
+        raise
+
+
+def _store_field(model, name, value):
+    # Entspricht Pydantics Handler für Modellfelder ohne validate_assignment
+    model.__dict__[name] = value
+    model.__pydantic_fields_set__.add(name)
 
 
 def tracked_save(method):
     def wrapper(self, *args, **kwargs):
-        if hasattr(self, "is_dirty") and callable(self.is_dirty):
-            force = kwargs.pop("force", False)
-            if not force and not self.is_dirty():
-                return None  # Nichts zu tun
+        if not isinstance(self, TrackingMixin):
+            return method(self, *args, **kwargs)
+        self._take_batch_mask()
+        # Bitmaske einmal lesen statt is_dirty(); danach ohne erneute Prüfung zurücksetzen
+        if not kwargs.pop("force", False) and not self.__dirty_mask__:
+            return None  # Nichts zu tun
         try:
-            result = method(self, *args, **kwargs)
+            return method(self, *args, **kwargs)
         finally:
-            if hasattr(self, "model_dump") and hasattr(self, "clear_dirty"):
-                self.__original_data__ = self.model_dump()
-                self.clear_dirty()
-                self.__is_new__ = False
-        return result
+            self.__dirty_mask__ = 0
+            self.__is_new__ = False
+            self._set_container_state(self._dirty_state())
 
     return wrapper
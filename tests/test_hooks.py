@@ -131,3 +131,95 @@ def test_onchange_returns_none_is_treated_as_true():
 
     assert m.mylist == [99]
     assert m.hook_log == ["onchange:mylist:99", "onchanged:mylist:None"]
+
+
+def test_hooks_defined_as_methods_without_registration():
+    class MethodHookModel(TrackingMixin, BaseModel):
+        mylist: List[int] = Field(default_factory=list)
+        hook_log: list = Field(default_factory=list)
+
+        def onchange(self, name, value):
+            self.hook_log.append(f"onchange:{name}:{value}")
+
+        def onchanged(self, name, old):
+            self.hook_log.append(f"onchanged:{name}:{old}")
+
+    m = MethodHookModel()
+    m.mylist.append(1)
+    assert m.hook_log == ["onchange:mylist:1", "onchanged:mylist:None"]
+
+
+def test_no_hooks_registered_still_tracks():
+    class PlainModel(TrackingMixin, BaseModel):
+        mylist: List[int] = Field(default_factory=list)
+
+    m = PlainModel()
+    m.mylist.append(1)
+    assert m.mylist.pop() == 1
+    assert m.dirty_fields() == ["mylist"]
+
+    # Nachträglich registrierter Hook wird berücksichtigt
+    m.onchange = lambda name, value: False
+    m.mylist.append(2)
+    assert m.mylist == []
+
+
+def test_batch_updates_defers_hooks_and_dirty_marks():
+    m = HookTestModel()
+    with m.batch_updates():
+        m.mylist.append(1)
+        m.mylist.extend([2, 3])
+        m.myset.add("x")
+        assert not m.is_dirty()
+        assert m.hook_log == []
+
+    assert m.mylist == [1, 2, 3]
+    assert sorted(m.dirty_fields()) == ["mylist", "myset"]
+    assert not m.is_new()
+    assert sorted(m.hook_log) == ["onchanged:mylist:None", "onchanged:myset:None"]
+
+    # Nach dem Block sind die Hooks wieder aktiv
+    m.mydict["a"] = 1
+    assert m.hook_log[-2:] == ["onchange:mydict:('a', 1)", "onchanged:mydict:None"]
+
+
+class SaveBase(BaseModel):
+    def save(self):
+        return "saved"
+
+
+class SavingHookModel(TrackingMixin, SaveBase):
+    value: int = 0
+    mylist: List[int] = Field(default_factory=list)
+
+
+def test_save_in_batch_keeps_containers_deferred():
+    m = SavingHookModel()
+    log = []
+    m.onchanged = lambda name, old: log.append(name)
+    with m.batch_updates():
+        m.save()
+        m.mylist.append(1)
+        assert not m.is_dirty()
+    assert m.dirty_fields() == ["mylist"]
+    assert log == ["mylist"]
+
+
+def test_save_and_clear_dirty_in_batch_drop_pending_fields():
+    m = SavingHookModel()
+    log = []
+    m.onchanged = lambda name, old: log.append(name)
+    with m.batch_updates():
+        m.value = 1
+        assert m.save() == "saved"
+        m.mylist.append(1)
+        m.clear_dirty()
+    assert not m.is_dirty()
+    assert log == []
+
+    with m.batch_updates():
+        m.value = 2
+        m.clear_dirty()
+        m.mylist.append(2)
+    assert m.dirty_fields() == ["mylist"]
+    assert log == ["mylist"]
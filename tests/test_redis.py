@@ -23,12 +23,23 @@ redis = get_redis_connection(host="localhost", port=6379, decode_responses=True)
 
 class TestModel(TrackingMixin, HashModel):
     field1: int = 0
+    field2: str = ""
 
     class Meta:
         database = redis
         global_key_prefix = "Test_TrackingMixin"
 
 
+class BytesTestModel(TrackingMixin, HashModel):
+    field1: int = 0
+    field2: str = ""
+
+    class Meta:
+        # Verbindung ohne decode_responses: HGETALL liefert Bytes
+        database = get_redis_connection(host="localhost", port=6379, decode_responses=False)
+        global_key_prefix = "Test_TrackingMixin"
+
+
 @pytest.fixture
 def cleanup():
     yield
@@ -78,3 +89,64 @@ def test_redis_om_tracking_full_flow(cleanup):
     m.save(force=True)
     m = reload_model(m.pk)
     assert m.field1 == 999
+
+
+def test_redis_om_save_writes_only_dirty_fields(cleanup):
+    m = TestModel(field1=1, field2="a")
+    m.save()
+    # Änderung an einem anderen Feld, z.B. durch einen zweiten Prozess
+    redis.hset(m.key(), "field2", "extern")
+
+    m.field1 = 2
+    m.save()
+    m = reload_model(m.pk)
+    assert m.field1 == 2
+    assert m.field2 == "extern"
+
+
+def test_redis_om_reload_many(cleanup):
+    m1 = TestModel(field1=1)
+    m2 = TestModel(field1=2)
+    m1.save()
+    m2.save()
+
+    loaded = TestModel.reload_many([m1.pk, "fehlt", m2.pk])
+    assert loaded[1] is None
+    assert [m.field1 for m in (loaded[0], loaded[2])] == [1, 2]
+    assert not loaded[0].is_dirty()
+    assert not loaded[0].is_new()
+
+
+def test_redis_om_reload_many_bytes_connection(cleanup):
+    m = BytesTestModel(field1=7, field2="roh")
+    m.save()
+
+    (loaded,) = BytesTestModel.reload_many([m.pk])
+    assert (loaded.field1, loaded.field2) == (7, "roh")
+    assert not loaded.is_dirty()
+    assert not loaded.is_new()
+
+
+def test_redis_om_unit_of_work(cleanup):
+    m1 = TestModel(field1=1)
+    m2 = TestModel(field1=2)
+    with TestModel.unit_of_work():
+        m1.save()
+        m2.save()
+        m1.field1 = 3
+        m1.save()
+        assert not redis.keys("Test_TrackingMixin:*")
+    assert [m.field1 for m in TestModel.reload_many([m1.pk, m2.pk])] == [3, 2]
+    assert not m1.is_dirty()
+    assert not m1.is_new()
+
+
+def test_redis_om_clear_dirty_before_first_save_writes_full_model(cleanup):
+    m = TestModel(field1=5, field2="zz")
+    m.field1 = 6
+    m.clear_dirty()  # nicht mehr neu, aber noch nie gespeichert
+    m.field2 = "yy"
+    m.save()
+    m = reload_model(m.pk)
+    assert m.field1 == 6
+    assert m.field2 == "yy"
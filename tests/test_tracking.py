@@ -11,11 +11,14 @@
 #
 # Autor: Ruediger Kessel
 
+import sys
 import warnings
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 
-from pydantic import BaseModel, Field
+import pytest
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model, model_validator
 
+from pydantic_tracking.containers import TrackedList, TrackedSet
 from pydantic_tracking.mixin import TrackingMixin, tracked_save  # Passe den Importpfad an
 
 
@@ -110,6 +113,7 @@ def test_list_tracking():
     assert m.is_dirty()
     assert not m.is_new()
     assert "tags" in m.dirty_fields()
+    assert list(m.iter_dirty_fields()) == ["tags"]
 
 
 def test_list_insert_and_clear():
@@ -129,11 +133,26 @@ def test_dict_operations():
     del m.data["x"]
     m.data.update({"a": 10, "b": 20})
     assert m.data == {"a": 10, "b": 20}
+    m.data.update([("c", 30)], d=40)
+    m.data.update(e=50)
+    assert m.data == {"a": 10, "b": 20, "c": 30, "d": 40, "e": 50}
+    del m.data["c"], m.data["d"], m.data["e"]
     m.data.pop("a")
     m.data.clear()
     assert m.data == {}
 
 
+def test_dict_update_none_raises():
+    class ModelWithDict(TrackingMixin, BaseModel):
+        data: Dict[str, int] = Field(default_factory=dict)
+
+    m = ModelWithDict()
+    # Wie dict.update(None): TypeError, Feld bleibt unverändert
+    with pytest.raises(TypeError):
+        m.data.update(None)
+    assert not m.is_dirty()
+
+
 def test_set_operations():
     class ModelWithSet(TrackingMixin, BaseModel):
         items: Set[str] = Field(default_factory=set)
@@ -148,6 +167,14 @@ def test_set_operations():
     assert m.items == set()
 
 
+def test_clear_dirty_after_change_is_not_new():
+    m = MyModel(tags=[1])
+    m.tags.append(2)
+    m.clear_dirty()
+    assert not m.is_dirty()
+    assert not m.is_new()
+
+
 def test_list_remove_marks_dirty():
     m = MyModel(tags=[1, 2, 3])
     m.clear_dirty()
@@ -177,3 +204,377 @@ def test_tracking_save_without_base_method_warns():
         assert len(w) == 1
         assert issubclass(w[0].category, UserWarning)
         assert "no save() method is defined in the parent class" in str(w[0].message)
+
+
+def test_missing_parent_save_warns_once_per_class():
+    class OnceModel(TrackingMixin, BaseModel):
+        field: int = 0
+
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always")
+        OnceModel(field=1).save()
+        OnceModel(field=2).save(force=True)
+    assert len(w) == 1
+
+
+def test_subclass_fields_are_wrapped():
+    class ExtendedModel(MyModel):
+        more: Set[int] = Field(default_factory=set)
+
+    m = ExtendedModel(tags=[1], more={2})
+    m.more.add(3)
+    assert m.dirty_fields() == ["more"]
+    assert type(m).__tracked_factories__ == {"tags": TrackedList, "more": TrackedSet}
+
+
+def test_list_append_none():
+    class ModelWithOptionals(TrackingMixin, BaseModel):
+        values: List[Optional[int]] = Field(default_factory=list)
+
+    m = ModelWithOptionals()
+    m.values.append(None)
+    m.values.insert(0, None)
+    assert m.values == [None, None]
+    assert m.is_dirty()
+
+
+def test_containers_have_no_instance_dict():
+    m = MyModel(tags=[1])
+    assert isinstance(m.tags, TrackedList)
+    assert not hasattr(m.tags, "__dict__")
+
+
+def test_attribute_error_in_parent_save_is_not_swallowed():
+    class FailingSave(BaseModel):
+        def save(self):
+            raise AttributeError("boom")
+
+    class FailingModel(TrackingMixin, FailingSave):
+        field: int = 0
+
+    m = FailingModel()
+    with pytest.raises(AttributeError, match="boom"):
+        m.save()
+
+
+def test_container_assignment():
+    m = MyModel(tags=[1, 2])
+    m.tags = m.tags
+    assert not m.is_dirty()
+
+    m.tags = [1, 2]
+    assert isinstance(m.tags, TrackedList)
+    assert m.dirty_fields() == ["tags"]
+
+
+def test_container_from_other_model_is_reparented():
+    m1 = MyModel(tags=[1])
+    m2 = MyModel()
+    tags = m1.tags
+    m2.tags = tags
+    assert m2.tags is tags
+    m2.clear_dirty()
+
+    m2.tags.append(2)
+    assert m2.dirty_fields() == ["tags"]
+    assert not m1.is_dirty()
+
+
+def test_construct_tracked():
+    m = MyModel.construct_tracked(tags=[1, 2])
+    assert isinstance(m.tags, TrackedList)
+    assert not m.is_new()
+    assert not m.is_dirty()
+
+    m.tags.append(3)
+    assert m.dirty_fields() == ["tags"]
+
+    # Leerer Default aus default_factory, nicht als gesetzt markiert
+    m = MyModel.construct_tracked()
+    assert isinstance(m.tags, TrackedList)
+    assert m.tags == []
+    assert m.model_fields_set == set()
+
+
+def test_validate_assignment_is_respected():
+    class ValidatedModel(TrackingMixin, BaseModel):
+        model_config = ConfigDict(validate_assignment=True)
+        field1: int = 0
+
+    m = ValidatedModel()
+    m.field1 = "5"
+    assert m.field1 == 5
+    assert m.dirty_fields() == ["field1"]
+    with pytest.raises(ValidationError):
+        m.field1 = "x"
+
+
+def test_fresh_model_keeps_tracking_state_on_class():
+    m = DummyModel(field1=1)
+    assert "__dirty_mask__" not in m.__dict__
+    assert "__is_new__" not in m.__dict__
+    assert not m.is_dirty()
+    assert m.is_new()
+
+
+def test_latched_container_is_rearmed():
+    m = MyModel(tags=[1])
+    m.tags.append(2)
+    m.tags.append(3)  # Feld ist bereits dirty
+    assert m.dirty_fields() == ["tags"]
+    assert isinstance(m.tags, TrackedList)
+
+    m.clear_dirty()
+    m.tags.remove(1)
+    assert m.dirty_fields() == ["tags"]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        m.save()
+    m.tags.clear()
+    assert m.dirty_fields() == ["tags"]
+
+    log = []
+    m.onchanged = lambda name, old: log.append(name)
+    m.tags.append(4)
+    assert log == ["tags"]
+    assert m.tags == [4]
+
+
+def test_dict_pop_defaults_to_none():
+    class ModelWithDict(TrackingMixin, BaseModel):
+        data: Dict[str, int] = Field(default_factory=dict)
+
+    m = ModelWithDict(data={"a": 1})
+    assert m.data.pop("x") is None
+    assert m.data.pop("a") == 1
+    # Eingerastet (Feld bereits dirty): gleiches Verhalten
+    assert m.data.pop("a") is None
+    assert m.data.pop("a", 0) == 0
+
+
+def test_model_copy_gets_own_containers():
+    m = MyModel(tags=[1])
+    for deep in (False, True):
+        c = m.model_copy(deep=deep)
+        c.tags.append(2)
+        assert isinstance(c.tags, TrackedList)
+        assert c.dirty_fields() == ["tags"]
+        assert not m.is_dirty()
+        assert m.tags == [1]
+
+
+class BaseModelPipelineSave(BaseModel):
+    def save(self, pipeline=None):
+        return pipeline
+
+
+class DummyModelPipeline(TrackingMixin, BaseModelPipelineSave):
+    field1: int = 0
+
+
+def test_save_passes_kwargs_to_parent():
+    m = DummyModelPipeline(field1=1)
+    m.field1 = 2
+    pipe = object()
+    assert m.save(pipeline=pipe) is pipe
+    assert not m.is_dirty()
+    assert m.save(pipeline=pipe) is None
+
+
+class CustomInitModel(TrackingMixin, BaseModel):
+    tags: List[int] = []
+
+    def __init__(self, **data):
+        data.setdefault("tags", [0])
+        super().__init__(**data)
+
+
+def test_custom_init_still_wraps_containers():
+    m = CustomInitModel()
+    assert isinstance(m.tags, TrackedList)
+    m.tags.append(1)
+    assert m.dirty_fields() == ["tags"]
+    assert isinstance(MyModel().tags, TrackedList)
+    assert MyModel().model_fields_set == set()
+
+
+class BaseModelCountingSave(BaseModel):
+    saves: int = 0
+
+    def save(self):
+        self.__dict__["saves"] += 1
+        return "saved"
+
+
+class DummyModelCounting(TrackingMixin, BaseModelCountingSave):
+    field1: int = 0
+
+
+def test_unit_of_work_saves_each_model_once_at_exit():
+    a = DummyModelCounting(field1=1)
+    b = DummyModelCounting(field1=2)
+    with TrackingMixin.unit_of_work():
+        a.field1 = 10
+        assert a.save() is None
+        a.save()
+        b.save(force=True)
+        assert a.saves == 0
+        assert a.is_dirty()
+    assert (a.saves, b.saves) == (1, 1)
+    assert not a.is_dirty()
+
+
+def test_unit_of_work_discards_on_exception():
+    a = DummyModelCounting(field1=1)
+    a.field1 = 2
+    with pytest.raises(RuntimeError), TrackingMixin.unit_of_work():
+        a.save()
+        raise RuntimeError
+    assert a.saves == 0
+    assert a.is_dirty()
+
+
+def test_dirty_fields_are_interned():
+    name = "".join(["dyn", "field"])
+    dynamic = create_model("Dynamic", __base__=(TrackingMixin, BaseModel), **{name: (int, 0)})
+    m = dynamic()
+    setattr(m, name, 1)
+    (dirty,) = m.dirty_fields()
+    assert dirty == name
+    # Zur Laufzeit gebauter, eigener String: nur die internierte Instanz ist identisch
+    assert dirty is sys.intern("".join(["dyn", "field"]))
+    assert dirty is dynamic.__field_names__[0]
+
+
+def test_containers_wrapped_by_validation():
+    class ValidatedListModel(TrackingMixin, BaseModel):
+        model_config = ConfigDict(validate_assignment=True)
+        tags: List[int] = []
+
+    m = ValidatedListModel.model_validate({"tags": [1]})
+    assert isinstance(m.tags, TrackedList)
+
+    m.tags = [2]
+    m.clear_dirty()
+    assert isinstance(m.tags, TrackedList)
+    m.tags.append(3)
+    assert m.dirty_fields() == ["tags"]
+
+
+def test_validate_assignment_keeps_containers_tracking():
+    class ValidatedMixedModel(TrackingMixin, BaseModel):
+        model_config = ConfigDict(validate_assignment=True)
+        field1: int = 0
+        tags: List[int] = []
+
+    # Pydantic ersetzt __dict__ bei jeder validierten Zuweisung
+    m = ValidatedMixedModel(tags=[1])
+    m.field1 = 5
+    m.tags.append(2)
+    assert m.dirty_fields() == ["field1", "tags"]
+
+    with pytest.raises(ValidationError):
+        m.field1 = "x"
+    m.clear_dirty()
+    assert not m.is_dirty()
+
+    # Zuweisung eines fremden Containers: das Quellmodell behält seinen Container
+    other = ValidatedMixedModel(tags=[7])
+    m.tags = other.tags
+    assert m.tags is not other.tags
+    other.tags.append(8)
+    assert other.dirty_fields() == ["tags"]
+    assert m.dirty_fields() == ["tags"]
+    assert m.tags == [7]
+
+
+hook_calls = []
+
+
+class ValidatorMutatesModel(TrackingMixin, BaseModel):
+    tags: List[int] = []
+
+    @model_validator(mode="after")
+    def add_zero(self):
+        self.tags.append(0)
+        return self
+
+    def onchanged(self, field, old):
+        hook_calls.append(field)
+
+
+def test_user_validator_mutating_container_keeps_model_clean():
+    m = ValidatorMutatesModel(tags=[3, 1])
+    assert m.tags == [3, 1, 0]
+    assert not m.is_dirty()
+    assert m.is_new()
+    assert isinstance(m.tags, TrackedList)
+
+    m = ValidatorMutatesModel.model_validate({"tags": [2]})
+    assert not m.is_dirty()
+    assert m.is_new()
+
+    class SubModel(ValidatorMutatesModel):
+        @model_validator(mode="after")
+        def add_one(self):
+            self.tags.append(1)
+            return self
+
+    m = SubModel(tags=[])
+    assert m.tags == [0, 1]
+    assert not m.is_dirty()
+    assert hook_calls == []
+    m.tags.append(2)
+    assert m.dirty_fields() == ["tags"]
+    assert hook_calls == ["tags"]
+
+
+class Order(TrackingMixin, BaseModel):
+    # Vorwärtsreferenz: Line ist beim Erzeugen der Klasse noch unbekannt
+    lines: "List[Line]" = []
+
+
+class Line(BaseModel):
+    qty: int = 0
+
+
+def test_forward_ref_container_is_tracked():
+    o = Order(lines=[Line()])
+    assert isinstance(o.lines, TrackedList)
+    o.lines.append(Line(qty=2))
+    assert o.dirty_fields() == ["lines"]
+
+    Order.model_rebuild(force=True)
+    o = Order()
+    o.lines.append(Line())
+    assert o.dirty_fields() == ["lines"]
+
+
+def test_tracked_save_in_batch_saves_pending_fields():
+    m = DummyModelSave(field1=1)
+    with m.batch_updates():
+        m.field1 = 2
+        assert m.save() == "saved"
+    assert not m.is_dirty()
+
+
+def test_frozen_rejects_assigning_same_object():
+    class FrozenModel(TrackingMixin, BaseModel):
+        model_config = ConfigDict(frozen=True)
+        name: str = "a"
+        tags: List[int] = []
+
+    class FrozenFieldModel(TrackingMixin, BaseModel):
+        name: str = Field("a", frozen=True)
+
+    m = FrozenModel()
+    with pytest.raises(ValidationError):
+        m.name = m.name
+    with pytest.raises(ValidationError):
+        m.tags = m.tags
+    f = FrozenFieldModel()
+    with pytest.raises(ValidationError):
+        f.name = f.name
+    assert not m.is_dirty()
+    assert not f.is_dirty()